@@ -1,5 +1,7 @@
+import functools
+import math
 import numpy as np
-import random
+from scipy.spatial.distance import pdist, squareform
 
 # Constants
 alpha = 4  # Path loss exponent
@@ -11,24 +13,82 @@ default_d2d_threshold = 150  # Maximum distance for D2D communication (in meters
 default_self_interference_cancellation = 110  # in dB
 base_station_ip = "192.168.1.1"  # Fixed IP for base station
 
-# Generate random IPs
+# Single generator for all simulation randomness; pass a seed for reproducible runs
+_rng = np.random.default_rng()
+_ip_pool = iter(_rng.integers(2, 255, size=1024))
+
+# Generate random IPs (drawn from a pre-generated pool, refilled on exhaustion)
 def generate_random_ip():
-    return f"192.168.1.{random.randint(2, 254)}"
+    global _ip_pool
+    try:
+        host = next(_ip_pool)
+    except StopIteration:
+        _ip_pool = iter(_rng.integers(2, 255, size=1024))
+        host = next(_ip_pool)
+    return f"192.168.1.{host}"
+
+# Cached scalar conversion: the simulation only ever uses a few dBm values
+@functools.lru_cache(maxsize=32)
+def _dbm_to_watts_scalar(dBm):
+    return 10 ** ((dBm - 30) / 10)
 
-# Convert dBm to Watts
+# Convert dBm to Watts (arrays are unhashable, so they skip the scalar cache)
 def dbm_to_watts(dBm):
-    return 10 ** ((dBm - 30) / 10)
+    if isinstance(dBm, np.ndarray):
+        return 10 ** ((dBm - 30) / 10)
+    return _dbm_to_watts_scalar(dBm)
+
+# Linear self-interference cancellation factor, cached for the same reason
+@functools.lru_cache(maxsize=32)
+def _cancel_factor(cancellation):
+    return 10 ** (cancellation / 10)
+
+# Constants precomputed once at import, so hot loops pay no pow/log per call
+_NOISE_W = 10 ** ((N0 - 30) / 10)
+_INV_LN2 = 1.0 / math.log(2)
 
-# SINR calculation
+# SINR calculation (Pt and d may be scalars or NumPy arrays)
 def calculate_sinr(Pt, d, cancellation=0):
     Pt_watts = dbm_to_watts(Pt)
-    residual_interference = Pt_watts / (10 ** (cancellation / 10)) if cancellation else 0
-    return Pt_watts / (d ** alpha * (dbm_to_watts(N0) + residual_interference))
+    residual_interference = Pt_watts / _cancel_factor(cancellation) if cancellation else 0
+    return Pt_watts / (d ** alpha * (_NOISE_W + residual_interference))
 
-# Throughput calculation
+# Throughput calculation (scalar path stays in math, vector path in NumPy)
 def calculate_throughput(Pt, d, cancellation=0):
     sinr = calculate_sinr(Pt, d, cancellation)
-    return W * np.log2(1 + sinr)
+    if isinstance(sinr, np.ndarray):
+        return W * np.log1p(sinr) * _INV_LN2
+    return W * math.log1p(sinr) * _INV_LN2
+
+# Branchless D2D-vs-infrastructure selection over arrays of distances.
+# Both throughputs are computed unconditionally; np.where picks per pair,
+# which beats per-pair Python branching by orders of magnitude at scale.
+def select_throughput(dist_ab, dist_a_bs, dist_b_bs, params):
+    th_d2d = calculate_throughput(params["Pt_d2d"], dist_ab, params["self_interference_cancellation"])
+    th_infra = np.minimum(
+        calculate_throughput(params["Pt_infra"], dist_a_bs),
+        calculate_throughput(params["Pt_infra"], dist_b_bs),
+    )
+    d2d_mask = dist_ab <= params["d2d_threshold"]
+    return np.where(d2d_mask, th_d2d, th_infra), d2d_mask
+
+# Full pairwise distance matrix over many node positions; positions should be
+# kept in one contiguous (N, 2) array so pdist runs entirely in C
+def all_distances(positions):
+    positions = np.ascontiguousarray(positions, dtype=float)
+    return squareform(pdist(positions))
+
+# Simulate a whole batch of node pairs in one vectorized pass
+def simulate_batch(pos_a_arr, pos_b_arr, pos_bs, params):
+    pos_a_arr = np.asarray(pos_a_arr, dtype=float)
+    pos_b_arr = np.asarray(pos_b_arr, dtype=float)
+    pos_bs = np.asarray(pos_bs, dtype=float)
+
+    dist_ab = np.linalg.norm(pos_a_arr - pos_b_arr, axis=1)
+    dist_a_bs = np.linalg.norm(pos_a_arr - pos_bs, axis=1)
+    dist_b_bs = np.linalg.norm(pos_b_arr - pos_bs, axis=1)
+
+    return select_throughput(dist_ab, dist_a_bs, dist_b_bs, params)
 
 # Simulate communication
 def simulate_communication(dist_ab, dist_a_bs, dist_b_bs, params):
@@ -72,7 +132,7 @@ def main():
         "self_interference_cancellation": default_self_interference_cancellation,
     }
 
-    pos_bs = np.array([250, 250])  # Base station at the center
+    pos_bs = (250, 250)  # Base station at the center
     pos_a = None
     pos_b = None
     global node_a, node_b
@@ -91,13 +151,13 @@ def main():
 
         if choice == "1":
             x, y = map(float, input("Enter position of Node A (x y): ").split())
-            pos_a = np.array([x, y])
+            pos_a = (x, y)
             node_a["ip"] = generate_random_ip()
             print(f"Node A position set to {pos_a} with IP {node_a['ip']}")
 
         elif choice == "2":
             x, y = map(float, input("Enter position of Node B (x y): ").split())
-            pos_b = np.array([x, y])
+            pos_b = (x, y)
             node_b["ip"] = generate_random_ip()
             print(f"Node B position set to {pos_b} with IP {node_b['ip']}")
 
@@ -119,10 +179,10 @@ def main():
                 print("Error: Please set positions for both Node A and Node B.")
                 continue
             
-            # Calculate distances
-            dist_ab = np.linalg.norm(pos_a - pos_b)  # Distance between A and B
-            dist_a_bs = np.linalg.norm(pos_a - pos_bs)  # Distance between A and Base Station
-            dist_b_bs = np.linalg.norm(pos_b - pos_bs)  # Distance between B and Base Station
+            # Calculate distances (math.hypot avoids array allocation for 2D points)
+            dist_ab = math.hypot(pos_a[0] - pos_b[0], pos_a[1] - pos_b[1])  # Distance between A and B
+            dist_a_bs = math.hypot(pos_a[0] - pos_bs[0], pos_a[1] - pos_bs[1])  # Distance between A and Base Station
+            dist_b_bs = math.hypot(pos_b[0] - pos_bs[0], pos_b[1] - pos_bs[1])  # Distance between B and Base Station
 
             # Run simulation
             throughput, mode, route = simulate_communication(dist_ab, dist_a_bs, dist_b_bs, params)
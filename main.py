@@ -1,71 +1,117 @@
+import collections
 import hashlib
 import hmac
 import secrets
 import subprocess
 import curses
 
+import numpy as np
+
 # ------------------------------------------------------------------------------
 
 class CryptographicHelper:
-    @staticmethod
-    def generate_hash(data):
-        return hashlib.sha256(data.encode()).hexdigest()
-
     @staticmethod
     def generate_hmac(key, data):
-        return hmac.new(key.encode(), data.encode(), hashlib.sha256).hexdigest()
+        """Computes an HMAC over pre-encoded bytes, avoiding per-call str.encode() round trips."""
+        return hmac.new(key, data, hashlib.sha256).hexdigest()
 
     @staticmethod
     def generate_nonce():
-        return secrets.token_hex(16)
+        """Returns 16 raw bytes; hex-format via .hex() only at print boundaries."""
+        return secrets.token_bytes(16)
 
 # ------------------------------------------------------------------------------
 
 class NetworkHelper:
-    assigned_ips = set()
+    network_id_map = {
+        "mn": "10.1.0",
+        "fa": "192.168.2",
+        "ha": "192.168.1"
+    }
+    _free_hosts = {}
+    _reserved_ips = set()
     routes = []
+    _route_queue = []
 
     @staticmethod
-    def assign_ip(entity_type):
-        network_id_map = {
-            "mn": "10.1.0",
-            "fa": "192.168.2",
-            "ha": "192.168.1"
-        }
+    def _host_pool(network_id):
+        """Returns the free-host deque for a /24 prefix, building and shuffling it on first use."""
+        pool = NetworkHelper._free_hosts.get(network_id)
+        if pool is None:
+            hosts = list(range(2, 255))
+            secrets.SystemRandom().shuffle(hosts)
+            pool = NetworkHelper._free_hosts[network_id] = collections.deque(hosts)
+        return pool
 
-        if entity_type not in network_id_map:
+    @staticmethod
+    def assign_ip(entity_type):
+        if entity_type not in NetworkHelper.network_id_map:
             raise ValueError(f"Unknown entity type: {entity_type}")
 
-        network_id = network_id_map[entity_type]
+        network_id = NetworkHelper.network_id_map[entity_type]
+        pool = NetworkHelper._host_pool(network_id)
+        if not pool:
+            raise RuntimeError(f"No free IPs left in {network_id}.0/24")
 
-        while True:
-            ip_address = f"{network_id}.{secrets.randbelow(255)}"
-            if ip_address not in NetworkHelper.assigned_ips:
-                NetworkHelper.assigned_ips.add(ip_address)
-                print(f"Assigned IP {ip_address} to {entity_type}")
-                return ip_address
+        ip_address = f"{network_id}.{pool.popleft()}"
+        print(f"Assigned IP {ip_address} to {entity_type}")
+        return ip_address
+
+    @staticmethod
+    def reserve_ip(ip_address):
+        """Marks a statically configured IP as taken so the pool never hands it out."""
+        network_id, _, host = ip_address.rpartition(".")
+        NetworkHelper._reserved_ips.add(ip_address)
+        pool = NetworkHelper._host_pool(network_id)
+        try:
+            pool.remove(int(host))
+        except ValueError:
+            pass
 
     @staticmethod
     def release_ip(ip_address):
-        """Releases an IP address, making it available for reassignment."""
-        if ip_address in NetworkHelper.assigned_ips:
-            NetworkHelper.assigned_ips.remove(ip_address)
-            print(f"Released IP {ip_address}.")
-        else:
+        """Releases an IP address, making it available for reassignment.
+
+        Reserved, malformed, out-of-range, and never-assigned addresses are
+        a graceful no-op so the pool can only ever re-emit hosts it owns.
+        """
+        network_id, _, host = ip_address.rpartition(".")
+        pool = NetworkHelper._free_hosts.get(network_id)
+        try:
+            host_num = int(host)
+        except ValueError:
+            host_num = None
+
+        if (pool is None or host_num is None or not 2 <= host_num <= 254
+                or ip_address in NetworkHelper._reserved_ips or host_num in pool):
             print(f"IP {ip_address} is not currently assigned.")
+        else:
+            pool.append(host_num)
+            print(f"Released IP {ip_address}.")
 
     @staticmethod
     def add_route(destination, gateway):
-        """Adds a route to the route table and executes the command."""
-        try:
-            NetworkHelper.routes.append({"destination": destination, "gateway": gateway})
+        """Records a route and queues it; kernel updates are applied in one batch by flush_routes()."""
+        NetworkHelper.routes.append({"destination": destination, "gateway": gateway})
+        NetworkHelper._route_queue.append((destination, gateway))
 
-            command = ["sudo", "route", "-n", "add", destination, gateway]  # For Mac
-            # command = ["sudo", "ip", "route", "add", destination, "via", gateway]  # For Linux
-            subprocess.run(command, check=True)
-            print(f"Successfully added route to {destination} via {gateway}")
+    @staticmethod
+    def flush_routes():
+        """Applies all queued route additions in a single shell invocation instead of one subprocess each."""
+        if not NetworkHelper._route_queue:
+            return
+
+        pending, NetworkHelper._route_queue = NetworkHelper._route_queue, []
+        # && chaining stops at the first failing add, so sh's exit status
+        # reflects it instead of reporting only the last command's result
+        script = " && ".join(f"route -n add {destination} {gateway}" for destination, gateway in pending)  # For Mac
+        # script = " && ".join(f"ip route add {destination} via {gateway}" for destination, gateway in pending)  # For Linux
+
+        try:
+            subprocess.run(["sudo", "sh", "-c", script], check=True)
+            print(f"Successfully added {len(pending)} route(s) in one batch")
         except subprocess.CalledProcessError as e:
-            print(f"Failed to add route: {e}")
+            print(f"Failed to add routes (batch of {len(pending)}): {e}")
         except Exception as e:
             print(f"Unexpected error: {e}")
 
@@ -114,6 +160,9 @@ class Registration:
 class MobileNode:
     def __init__(self, identity, home_agent):
         self.identity = identity
+        self._identity_b = identity.encode()
+        # Identity bytes absorbed once; temp identities clone this and append the nonce
+        self._id_hasher = hashlib.sha256(self._identity_b)
         self.shared_key_mn_ha = None
         self.temp_identity = None
         self.nonce_mn = CryptographicHelper.generate_nonce()
@@ -132,8 +181,13 @@ class MobileNode:
         registration = Registration("re-registration", self.original_ha, request_data)
         return fa.handle_registration_request(self, self.original_ha, registration)
 
+    def _derive_temp_identity(self):
+        hasher = self._id_hasher.copy()
+        hasher.update(self.nonce_mn)
+        return hasher.digest()
+
     def initiate_registration(self, ha, fa):
-        self.temp_identity = CryptographicHelper.generate_hash(f"{self.identity}{self.nonce_mn}")
+        self.temp_identity = self._derive_temp_identity()
         request_data = {
             "temp_identity": self.temp_identity,
             "nonce_mn": self.nonce_mn,
@@ -147,7 +201,7 @@ class MobileNode:
         self.coa = NetworkHelper.assign_ip("mn")
         self.home_agent = ha
         self.nonce_mn = CryptographicHelper.generate_nonce()
-        self.temp_identity = CryptographicHelper.generate_hash(f"{self.identity}{self.nonce_mn}")
+        self.temp_identity = self._derive_temp_identity()
 
         request_data = {
             "temp_identity": self.temp_identity,
@@ -165,6 +219,7 @@ class MobileNode:
 class ForeignAgent:
     def __init__(self, identity, ip_address):
         self.identity = identity
+        self._identity_b = identity.encode()
         self.ip_address = ip_address if ip_address else NetworkHelper.assign_ip("fa")
         self.nonce_fa = CryptographicHelper.generate_nonce()
 
@@ -183,21 +238,43 @@ class HomeAgent:
         self.identity = identity
         self.ip_address = ip_address if ip_address else NetworkHelper.assign_ip("ha")
         self.shared_key_mn_ha = "shared_secret_mn_ha"
+        self._shared_key_b = self.shared_key_mn_ha.encode()
         self.nonce_ha = CryptographicHelper.generate_nonce()
         self.bindings = {}
-        self.peers = set()
+        self._hmac_cache = {}
+        self._verifier_cache = {}
+
+    @property
+    def peers(self):
+        """Peer HA identities, derived from the shared adjacency bit-matrix."""
+        row = ha_index.get(self.identity)
+        if row is None:
+            return set()
+        return {_ha_rows[j] for j in np.where(_adj[row])[0]}
 
     def process_registration(self, fa, mn, registration):
         temp_identity = registration.data["temp_identity"]
-        if temp_identity == CryptographicHelper.generate_hash(f"{mn.identity}{registration.data['nonce_mn']}"):
-            shared_key_mn_fa = CryptographicHelper.generate_hmac(
-                self.shared_key_mn_ha,
-                registration.data['nonce_mn'] + self.nonce_ha + fa.identity
-            )
+
+        # Reuse the per-MN identity-prefix hasher: clone it and append the nonce
+        prefix_hasher = self._verifier_cache.get(mn.identity)
+        if prefix_hasher is None:
+            prefix_hasher = self._verifier_cache[mn.identity] = hashlib.sha256(mn._identity_b)
+        verifier = prefix_hasher.copy()
+        verifier.update(registration.data["nonce_mn"])
+
+        if temp_identity == verifier.digest():
+            cache_key = (registration.data["nonce_mn"], self.nonce_ha, fa.identity)
+            shared_key_mn_fa = self._hmac_cache.get(cache_key)
+            if shared_key_mn_fa is None:
+                shared_key_mn_fa = CryptographicHelper.generate_hmac(
+                    self._shared_key_b,
+                    b"".join((registration.data["nonce_mn"], self.nonce_ha, fa._identity_b))
+                )
+                self._hmac_cache[cache_key] = shared_key_mn_fa
             binding = {
-                "temp_identity": temp_identity,
+                "temp_identity": temp_identity.hex(),
                 "shared_key_mn_fa": shared_key_mn_fa,
-                "nonce_ha": self.nonce_ha,
+                "nonce_ha": self.nonce_ha.hex(),
                 "coa": registration.data["coa"],
                 "foreign_agent": fa.ip_address
             }
@@ -214,34 +291,86 @@ class HomeAgent:
 
 # ------------------------------------------------------------------------------
         
+# Mesh adjacency as a single boolean bit-matrix instead of per-HA peer sets:
+# _adj[i, j] is True when HA row i and HA row j are connected.
+_INITIAL_HA_CAPACITY = 64
+_adj = np.zeros((_INITIAL_HA_CAPACITY, _INITIAL_HA_CAPACITY), dtype=bool)
+ha_index = {}   # HA id -> row in _adj
+_ha_rows = []   # row in _adj -> HA id
+
+
+def _register_ha_row(ha_id):
+    """Assigns (or returns) the adjacency-matrix row for an HA, growing the matrix if needed."""
+    global _adj
+
+    if ha_id in ha_index:
+        return ha_index[ha_id]
+
+    row = len(_ha_rows)
+    if row >= _adj.shape[0]:
+        grown = np.zeros((_adj.shape[0] * 2, _adj.shape[0] * 2), dtype=bool)
+        grown[:_adj.shape[0], :_adj.shape[0]] = _adj
+        _adj = grown
+
+    ha_index[ha_id] = row
+    _ha_rows.append(ha_id)
+    return row
+
+
 def create_mesh_topology():
     """Establishes a fully connected mesh topology among all Home Agents, and adds routes between HAs and FAs."""
     print("\nCreating Full Mesh Topology Between Home Agents...")
-    
+
+    for ha_id in ha_registry:
+        _register_ha_row(ha_id)
+
     for ha_id, ha in ha_registry.items():
-        ha.peers = set()
-        
+        row = ha_index[ha_id]
+
         for peer_id, peer_ha in ha_registry.items():
             if ha_id != peer_id:
-                ha.peers.add(peer_id)
-                
+                _adj[row, ha_index[peer_id]] = True
+
                 NetworkHelper.add_route(peer_ha.ip_address, ha.ip_address)
                 NetworkHelper.add_route(ha.ip_address, peer_ha.ip_address)
 
-                print(f"HA {ha_id} (IP: {ha.ip_address}) connected to HA {peer_id} (IP: {peer_ha.ip_address})")
+    for (ha_id, ha), (fa_id, fa) in zip(ha_registry.items(), fa_registry.items()):
+        NetworkHelper.add_route(fa.ip_address, ha.ip_address)
+        NetworkHelper.add_route(ha.ip_address, fa.ip_address)
 
-        for index in range(len(ha_registry)):
-            ha_id, ha = list(ha_registry.items())[index]
-            fa_id, fa = list(fa_registry.items())[index]
-            
-            NetworkHelper.add_route(fa.ip_address, ha.ip_address)
-            NetworkHelper.add_route(ha.ip_address, fa.ip_address)
-            
-            print(f"HA {ha_id} (IP: {ha.ip_address}) connected to FA {fa_id} (IP: {fa.ip_address})")
-                
+    # Per-edge reporting is deliberately left to print_mesh_topology (menu
+    # option 8) so topology updates stay a pure in-memory mutation
     print("Full mesh topology created successfully, including routes to Foreign Agents.\n")
 
-    
+
+def _attach_ha(new_id):
+    """Incrementally connects a newly added HA to every existing HA (O(N) instead of an O(N²) rebuild)."""
+    new_ha = ha_registry[new_id]
+    row = _register_ha_row(new_id)
+
+    for ha_id, ha in ha_registry.items():
+        if ha_id == new_id:
+            continue
+
+        peer_row = ha_index[ha_id]
+        _adj[row, peer_row] = _adj[peer_row, row] = True
+
+        NetworkHelper.add_route(ha.ip_address, new_ha.ip_address)
+        NetworkHelper.add_route(new_ha.ip_address, ha.ip_address)
+
+
+def _detach_ha(ha_id):
+    """Removes an HA from the mesh, dropping its peer links and its route."""
+    row = ha_index.get(ha_id)
+    if row is None:
+        return
+
+    # Clearing the row/column severs every peer link; the row mapping is
+    # kept so a re-attached HA reuses its slot instead of leaking one.
+    _adj[row, :] = _adj[:, row] = False
+    NetworkHelper.remove_route(ha_registry[ha_id].ip_address)
+
+
 def print_mesh_topology():
     """Prints the mesh topology of the Home Agents."""
     if not ha_registry:
@@ -251,20 +380,15 @@ def print_mesh_topology():
     print("\nMesh Topology of Home Agents:\n")
     
     ha_ids = list(ha_registry.keys())
+    cols = [ha_index[ha_id] for ha_id in ha_ids]
 
-    print("   ", end="")
-    for ha_id in ha_ids:
-        print(f"{ha_id:>8}", end="")
-    print()
-
+    # Assemble the whole table as one string so N² cells cost N² joins
+    # but only a single print call instead of one per cell
+    lines = ["   " + "".join(f"{ha_id:>8}" for ha_id in ha_ids)]
     for ha_id in ha_ids:
-        print(f"{ha_id:<3}", end="")
-        for peer_id in ha_ids:
-            if peer_id in ha_registry[ha_id].peers:
-                print(f"{'✓':>8}", end="")
-            else:
-                print(f"{' ':>8}", end="")
-        print()
+        row = _adj[ha_index[ha_id]]
+        lines.append(f"{ha_id:<3}" + "".join("       ✓" if row[j] else "        " for j in cols))
+    print("\n".join(lines))
 
     print("\nLegend: ✓ indicates a connection between the Home Agents.\n")
 
@@ -282,14 +406,31 @@ fa_registry = {
     }
 mn_registry = {}
 
+# Tuple snapshots of the registries, rebuilt only when networks are added or
+# removed, so indexed access does not materialize the items list per call.
+_ha_items = ()
+_fa_items = ()
+_ha_ids_arr = np.empty(0, dtype=object)
+_fa_ids_arr = np.empty(0, dtype=object)
+
+def _refresh_registry_items():
+    global _ha_items, _fa_items, _ha_ids_arr, _fa_ids_arr
+    _ha_items = tuple(ha_registry.items())
+    _fa_items = tuple(fa_registry.items())
+    _ha_ids_arr = np.array(list(ha_registry), dtype=object)
+    _fa_ids_arr = np.array(list(fa_registry), dtype=object)
+
+_refresh_registry_items()
+
 for ha in ha_registry.values():
-    NetworkHelper.assigned_ips.add(ha.ip_address)
+    NetworkHelper.reserve_ip(ha.ip_address)
 
 for fa in fa_registry.values():
-    NetworkHelper.assigned_ips.add(fa.ip_address)
+    NetworkHelper.reserve_ip(fa.ip_address)
 
-print("Initial assigned IPs:", NetworkHelper.assigned_ips)
+print("Initial assigned IPs:", [ha.ip_address for ha in ha_registry.values()] + [fa.ip_address for fa in fa_registry.values()])
 create_mesh_topology()
+NetworkHelper.flush_routes()
 
 # ------------------------------------------------------------------------------
 
@@ -310,6 +451,7 @@ def ping_mobile_node():
     target = mn_registry[target_id]
 
     NetworkHelper.add_route(source.coa, target.coa)
+    NetworkHelper.flush_routes()
 
     try:
         print(f"Pinging from Mobile Node {source_id} ({source.coa}) to {target_id} ({target.coa})...")
@@ -328,9 +470,9 @@ def add_mobile_node():
         print("Error: MN already exists.")
         return
 
-    ha_index = secrets.randbelow(len(ha_registry))
-    ha_id, ha = list(ha_registry.items())[ha_index]
-    fa_id, fa = list(fa_registry.items())[ha_index]
+    network_index = secrets.randbelow(len(_ha_items))
+    ha_id, ha = _ha_items[network_index]
+    fa_id, fa = _fa_items[network_index]
 
     if not fa:
         print(f"Error: No corresponding Foreign Agent found for Home Agent {ha_id}.")
@@ -347,6 +489,7 @@ def add_mobile_node():
     except Exception as e:
         print(f"Registration failed: {e}")
 
+    NetworkHelper.flush_routes()
     print(f"Mobile Node {mn_id} created, registered, and assigned to network {ha_id}-{fa_id}.")
     
 def add_network():
@@ -356,8 +499,13 @@ def add_network():
     ha_ip, fa_ip = NetworkHelper.assign_ip("ha"), NetworkHelper.assign_ip("fa")
     ha, fa = HomeAgent(ha_id, ha_ip), ForeignAgent(fa_id, fa_ip)
     ha_registry[ha_id], fa_registry[fa_id] = ha, fa
+    _refresh_registry_items()
+
+    _attach_ha(ha_id)
+    NetworkHelper.add_route(fa.ip_address, ha.ip_address)
+    NetworkHelper.add_route(ha.ip_address, fa.ip_address)
+    NetworkHelper.flush_routes()
 
-    create_mesh_topology()
     print(f"Added Home Agent {ha_id} with IP {ha_ip}.")
     print(f"Added Foreign Agent {fa_id} with IP {fa_ip}.")
 
@@ -373,10 +521,10 @@ def move_mobile_node():
     print(f"  Home Agent: {current_ha.identity} (IP: {current_ha.ip_address})")
     print(f"  Care-of Address (COA): {mn.coa}\n")
 
+    mask = _ha_ids_arr != current_ha.identity
     available_networks = [
-        (ha_id, ha, fa_id, fa)
-        for (ha_id, ha), (fa_id, fa) in zip(ha_registry.items(), fa_registry.items())
-        if ha_id != current_ha.identity
+        (ha_id, ha_registry[ha_id], fa_id, fa_registry[fa_id])
+        for ha_id, fa_id in zip(_ha_ids_arr[mask], _fa_ids_arr[mask])
     ]
 
     if not available_networks:
@@ -387,25 +535,35 @@ def move_mobile_node():
         curses.curs_set(0)
         selected_index = 0
 
-        while True:
-            stdscr.clear()
-            stdscr.addstr("Use Arrow Keys to navigate and press Enter to select:\n\n")
+        # Draw every row once; keystrokes then only flip the highlight
+        # attribute on the two affected lines instead of a full repaint.
+        rows = [
+            f"  Home Agent: {ha_id} (IP: {ha.ip_address}), Foreign Agent: {fa_id} (IP: {fa.ip_address})"
+            for ha_id, ha, fa_id, fa in available_networks
+        ]
+        header_lines = 2
 
-            for idx, (ha_id, ha, fa_id, fa) in enumerate(available_networks):
-                if idx == selected_index:
-                    stdscr.addstr(f"> Home Agent: {ha_id} (IP: {ha.ip_address}), Foreign Agent: {fa_id} (IP: {fa.ip_address})\n", curses.A_REVERSE)
-                else:
-                    stdscr.addstr(f"  Home Agent: {ha_id} (IP: {ha.ip_address}), Foreign Agent: {fa_id} (IP: {fa.ip_address})\n")
+        stdscr.addstr("Use Arrow Keys to navigate and press Enter to select:\n\n")
+        for row in rows:
+            stdscr.addstr(row + "\n")
+        stdscr.chgat(header_lines + selected_index, 0, curses.A_REVERSE)
 
+        while True:
+            stdscr.refresh()
             key = stdscr.getch()
+            prev_index = selected_index
 
             if key == curses.KEY_UP and selected_index > 0:
                 selected_index -= 1
-            elif key == curses.KEY_DOWN and selected_index < len(available_networks) - 1:
+            elif key == curses.KEY_DOWN and selected_index < len(rows) - 1:
                 selected_index += 1
             elif key in [curses.KEY_ENTER, 10, 13]:
                 return selected_index
 
+            if selected_index != prev_index:
+                stdscr.chgat(header_lines + prev_index, 0, curses.A_NORMAL)
+                stdscr.chgat(header_lines + selected_index, 0, curses.A_REVERSE)
+
     selected_index = curses.wrapper(network_selection_menu)
 
     new_ha_id, new_ha, new_fa_id, new_fa = available_networks[selected_index]
@@ -414,6 +572,7 @@ def move_mobile_node():
     print(f"  New Foreign Agent: {new_fa_id} (IP: {new_fa.ip_address})\n")
 
     response = mn.move_to_new_network(new_ha, new_fa)
+    NetworkHelper.flush_routes()
 
     if mn_id in current_ha.bindings and current_ha != mn.original_ha:
         print(f"Removing binding for Mobile Node {mn_id} from old Home Agent {current_ha.identity}.")